@@ -6,20 +6,58 @@ CLI entry point
 
 import os
 import sys
+import json
 import asyncio
 import argparse
+import traceback
 import dotenv
 
 from bugninja_v2.bugninja import BugNinja
 
 
-async def main():
-    """Main entry point for the web testing tool."""
-    # Parse command line arguments
+async def run_session(url, goal, args, session_id=0):
+    """Run a single test session with its own browser and output directory"""
+    # Give each session its own output directory so artifacts don't collide
+    output_dir = args.output_dir
+    if session_id:
+        output_dir = os.path.join(args.output_dir, f"session_{session_id}")
+
+    tester = BugNinja(
+        headless=args.headless,
+        output_dir=output_dir,
+        video_quality=args.video_quality,
+        goal_confidence=args.goal_confidence,
+        fast_input=args.fast_input,
+        use_cache=not args.no_cache,
+    )
+
+    try:
+        # Start the browser
+        await tester.start()
+
+        # Run the test
+        return await tester.run_test(url, goal, args.max_steps)
+    finally:
+        # Close the browser
+        await tester.stop()
+
+
+def parse_args():
+    """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="AI-driven web testing tool")
-    parser.add_argument("--url", required=True, help="Starting URL for testing")
+    parser.add_argument("--url", help="Starting URL for testing")
+    parser.add_argument(
+        "--goal", help="Testing goal (e.g., 'Sign up for a new account')"
+    )
     parser.add_argument(
-        "--goal", required=True, help="Testing goal (e.g., 'Sign up for a new account')"
+        "--tasks-file",
+        help="JSONL file of {\"url\": ..., \"goal\": ...} tasks to run concurrently",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=3,
+        help="Maximum number of concurrent sessions when using --tasks-file",
     )
     parser.add_argument(
         "--max-steps", type=int, default=10, help="Maximum number of steps to take"
@@ -38,22 +76,37 @@ async def main():
         default="medium",
         help="Quality of video recording (low/medium/high)",
     )
+    parser.add_argument(
+        "--fast-input",
+        action="store_true",
+        help="Fill text fields in one step instead of human-like typing",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Disable the on-disk AI decision cache",
+    )
     parser.add_argument(
         "--goal-confidence",
         type=float,
         default=0.8,
         help="Confidence threshold for goal detection (0.0-1.0, default: 0.8)",
     )
-    args = parser.parse_args()
+    return parser.parse_args()
+
+
+async def main(args):
+    """Main entry point for the web testing tool."""
+    # Either a single url/goal pair or a tasks file must be provided
+    if not args.tasks_file and not (args.url and args.goal):
+        print("⚠️ Provide --url and --goal, or --tasks-file for batch runs")
+        return 1
 
     # Validate confidence threshold
     if args.goal_confidence < 0.0 or args.goal_confidence > 1.0:
         print("⚠️ Goal confidence threshold must be between 0.0 and 1.0")
         return 1
 
-    # Load environment variables from .env file if it exists
-    dotenv.load_dotenv()
-
     # Check for OpenAI credentials
     if not os.getenv("AZURE_OPENAI_ENDPOINT") or not os.getenv("AZURE_OPENAI_API_KEY"):
         print(
@@ -62,21 +115,33 @@ async def main():
         print("Please set AZURE_OPENAI_ENDPOINT and AZURE_OPENAI_API_KEY")
         return 1
 
-    # Initialize the web tester
-    tester = BugNinja(
-        headless=args.headless,
-        output_dir=args.output_dir,
-        video_quality=args.video_quality,
-        goal_confidence=args.goal_confidence,
-    )
-
     try:
-        # Start the browser
-        await tester.start()
-
-        # Run the test
-        success = await tester.run_test(args.url, args.goal, args.max_steps)
-
+        if args.tasks_file:
+            # Run independent (url, goal) tasks concurrently; sessions are
+            # I/O-bound on the model and the browser, so a small worker pool
+            # gives near-linear speedup up to the API rate limit
+            with open(args.tasks_file) as f:
+                tasks = [json.loads(line) for line in f if line.strip()]
+
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def bounded_session(task, session_id):
+                async with semaphore:
+                    return await run_session(
+                        task["url"], task["goal"], args, session_id
+                    )
+
+            results = await asyncio.gather(
+                *(bounded_session(task, i + 1) for i, task in enumerate(tasks)),
+                return_exceptions=True,
+            )
+
+            successes = sum(1 for r in results if r is True)
+            print(f"\n📊 {successes}/{len(tasks)} tasks achieved their goal")
+            return 0 if successes == len(tasks) else 1
+
+        # Single-task mode
+        success = await run_session(args.url, args.goal, args)
         return 0 if success else 1
 
     except KeyboardInterrupt:
@@ -84,19 +149,21 @@ async def main():
         return 130
     except Exception as e:
         print(f"❌ Error: {e}")
-        import traceback
-
-        traceback.print_exc()
+        traceback.print_exc(limit=5)
         return 1
-    finally:
-        # Close the browser
-        await tester.stop()
 
 
 def main_cli():
     """Entry point for the CLI."""
-    sys.exit(asyncio.run(main()))
+    # Parse before starting the event loop so --help and argument errors
+    # exit without touching the filesystem or spinning up asyncio
+    args = parse_args()
+
+    # Load environment variables from .env file if it exists
+    dotenv.load_dotenv()
+
+    sys.exit(asyncio.run(main(args)))
 
 
 if __name__ == "__main__":
-    sys.exit(asyncio.run(main()))
+    main_cli()
@@ -6,10 +6,12 @@ A modular implementation with separate classes for different responsibilities
 
 import os
 import asyncio
+import functools
 import json
 import random
 import time
 import traceback
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
@@ -20,20 +22,129 @@ from openai import AsyncAzureOpenAI
 from playwright_stealth import stealth_sync
 
 
+# Deployment name resolved once instead of on every model call
+@functools.lru_cache(maxsize=1)
+def _deployment_name() -> str:
+    """Return the Azure OpenAI deployment name, cached after first lookup"""
+    return os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
+
+
+# Shared Azure OpenAI client, created lazily so repeated AIController
+# construction reuses the same httpx connection pool.
+_client: Optional[AsyncAzureOpenAI] = None
+
+
+def _get_client() -> AsyncAzureOpenAI:
+    """Return the shared AsyncAzureOpenAI client, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = AsyncAzureOpenAI(
+            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+            api_version="2023-12-01-preview",
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        )
+    return _client
+
+
+# Resource types and tracker domains skipped when request blocking is enabled.
+# Images are deliberately left alone: the screenshots feed the vision model.
+_BLOCKED_RESOURCE_TYPES = {"font", "media"}
+_TRACKER_DOMAINS = (
+    "googletagmanager.com",
+    "google-analytics.com",
+    "doubleclick.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "segment.io",
+)
+
+
+# Harvest script defined once at module scope: the browser caches compiled
+# scripts by source text, so sending the identical string every call lets V8
+# reuse the compiled function instead of re-parsing ~2 KB of JS per step.
+_GET_ELEMENTS_JS = """
+() => {
+    function isVisible(el) {
+        try {
+            const rect = el.getBoundingClientRect();
+            const style = window.getComputedStyle(el);
+            return rect.width > 0 && rect.height > 0 &&
+                   style.display !== 'none' &&
+                   style.visibility !== 'hidden' &&
+                   parseFloat(style.opacity) > 0;
+        } catch (e) {
+            return false;
+        }
+    }
+
+    try {
+        const elements = [];
+        const selectors = 'a, button, input, select, textarea, [role="button"], [role="link"], [role="checkbox"], [onclick]';
+
+        document.querySelectorAll(selectors).forEach(el => {
+            try {
+                if (!isVisible(el)) return;
+
+                const rect = el.getBoundingClientRect();
+                elements.push({
+                    tag: el.tagName.toLowerCase(),
+                    type: el.type || '',
+                    x: rect.left,
+                    y: rect.top,
+                    width: rect.width,
+                    height: rect.height,
+                    text: (el.textContent || '').trim(),
+                    placeholder: el.placeholder || '',
+                    value: el.value || '',
+                    aria_label: el.getAttribute('aria-label') || '',
+                    id: el.id || '',
+                    class_name: el.className || '',
+                    center_x: rect.left + rect.width / 2,
+                    center_y: rect.top + rect.height / 2
+                });
+            } catch (elementError) {
+                console.error('Error processing element:', elementError);
+            }
+        });
+
+        return elements;
+    } catch (mainError) {
+        console.error('Error in main execution:', mainError);
+        return [];
+    }
+}
+"""
+
+
 class WebCrawler:
     """Handles all web interactions and element detection"""
 
-    def __init__(self, headless: bool = True, output_dir: str = "./output"):
+    def __init__(
+        self,
+        headless: bool = True,
+        output_dir: str = "./output",
+        block_resources: bool = False,
+    ):
         self.headless = headless
+        self.block_resources = block_resources
         self.output_dir = Path(output_dir)
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self.pages: List[Page] = []
         self.cookie_consent_handled = {}
+        # Last harvest, keyed by (url, cheap DOM signature) so retries on an
+        # unchanged page skip the full element walk
+        self._elements_cache_key = None
+        self._elements_cache: List[Dict] = []
 
     async def start(self):
-        """Initialize browser with stealth settings"""
+        """Initialize browser with stealth settings (no-op if already warm)"""
+        if self.browser:
+            # Reuse the running browser/context across tests; a cold Chromium
+            # launch costs 1-2s per run
+            return
+
         playwright = await async_playwright().start()
 
         # Launch browser with anti-detection settings
@@ -59,8 +170,16 @@ class WebCrawler:
             ignore_https_errors=True,
         )
 
+        # Optionally cut page weight by aborting fonts, media, and trackers
+        if self.block_resources:
+            await self.context.route("**/*", self._route_filter)
+
         # Set up event listeners for new pages
-        self.context.on("page", self._handle_new_page)
+        # Fire-and-forget so the browser's event dispatch is never blocked
+        # waiting on our page setup
+        self.context.on(
+            "page", lambda page: asyncio.create_task(self._handle_new_page(page))
+        )
 
         # Create initial page
         self.page = await self.context.new_page()
@@ -69,6 +188,16 @@ class WebCrawler:
 
         print("🚀 Browser started with stealth mode")
 
+    async def _route_filter(self, route):
+        """Abort requests for heavy resources and known tracker domains"""
+        request = route.request
+        if request.resource_type in _BLOCKED_RESOURCE_TYPES or any(
+            domain in request.url for domain in _TRACKER_DOMAINS
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+
     async def _handle_new_page(self, page: Page):
         """Handle a new page/tab being opened"""
         print("🔄 New tab/window detected")
@@ -114,11 +243,32 @@ class WebCrawler:
             await self.context.close()
         if self.browser:
             await self.browser.close()
+        # Clear the handles so a later start() relaunches instead of
+        # "reusing" a closed browser
+        self.browser = None
+        self.context = None
+        self.page = None
+        self.pages = []
 
     async def navigate(self, url: str):
-        """Navigate to URL and wait for load"""
-        await self.page.goto(url)
-        await self.wait_for_load()
+        """Navigate to URL and wait until the page is actionable
+
+        wait_until='commit' returns as soon as the navigation is committed,
+        and the readiness probe then waits only for parsing to finish and
+        interactive elements to appear — unlike the default 'load' event,
+        which blocks on every image and subresource.
+        """
+        await self.page.goto(url, wait_until="commit", timeout=10000)
+        try:
+            await self.page.wait_for_function(
+                "document.readyState !== 'loading' && "
+                "document.querySelectorAll('button, a, input, select').length > 0",
+                timeout=8000,
+            )
+        except:
+            # Some pages legitimately expose no interactive elements at load;
+            # fall back to the regular load wait
+            await self.wait_for_load()
 
     async def wait_for_load(self):
         """Wait for page to be fully loaded"""
@@ -126,66 +276,30 @@ class WebCrawler:
             await self.page.wait_for_load_state("networkidle", timeout=10000)
         except:
             await self.page.wait_for_load_state("domcontentloaded")
-            await asyncio.sleep(1)
+            # Give late scripts a bounded window instead of a fixed second
+            try:
+                await self.page.wait_for_load_state("load", timeout=1000)
+            except:
+                pass
 
     async def get_elements(self) -> List[Dict]:
         """Get all interactive elements with their coordinates and properties"""
         try:
-            js_code = """
-            () => {
-                function isVisible(el) {
-                    try {
-                        const rect = el.getBoundingClientRect();
-                        const style = window.getComputedStyle(el);
-                        return rect.width > 0 && rect.height > 0 && 
-                               style.display !== 'none' && 
-                               style.visibility !== 'hidden' && 
-                               parseFloat(style.opacity) > 0;
-                    } catch (e) {
-                        return false;
-                    }
-                }
-
-                try {
-                    const elements = [];
-                    const selectors = 'a, button, input, select, textarea, [role="button"], [role="link"], [role="checkbox"], [onclick]';
-                    
-                    document.querySelectorAll(selectors).forEach(el => {
-                        try {
-                            if (!isVisible(el)) return;
-                            
-                            const rect = el.getBoundingClientRect();
-                            elements.push({
-                                tag: el.tagName.toLowerCase(),
-                                type: el.type || '',
-                                x: rect.left,
-                                y: rect.top,
-                                width: rect.width,
-                                height: rect.height,
-                                text: (el.textContent || '').trim(),
-                                placeholder: el.placeholder || '',
-                                value: el.value || '',
-                                aria_label: el.getAttribute('aria-label') || '',
-                                id: el.id || '',
-                                class_name: el.className || '',
-                                center_x: rect.left + rect.width / 2,
-                                center_y: rect.top + rect.height / 2
-                            });
-                        } catch (elementError) {
-                            console.error('Error processing element:', elementError);
-                        }
-                    });
-                    
-                    return elements;
-                } catch (mainError) {
-                    console.error('Error in main execution:', mainError);
-                    return [];
-                }
-            }
-            """
+            # Cheap DOM signature first: if the page hasn't changed since the
+            # last harvest (common after failed clicks), reuse the result
+            signature = await self.page.evaluate(
+                "() => document.querySelectorAll('*').length + ':' + "
+                "(document.body ? document.body.innerText.length : 0)"
+            )
+            cache_key = (self.page.url, signature)
+            if cache_key == self._elements_cache_key:
+                print(f"🔍 Reusing {len(self._elements_cache)} cached elements")
+                return self._elements_cache
 
-            elements = await self.page.evaluate(js_code)
+            elements = await self.page.evaluate(_GET_ELEMENTS_JS)
             print(f"🔍 Found {len(elements)} interactive elements")
+            self._elements_cache_key = cache_key
+            self._elements_cache = elements
             return elements
 
         except Exception as e:
@@ -239,11 +353,20 @@ class WebCrawler:
             await self.page.mouse.move(x, y)
             await asyncio.sleep(random.uniform(0.01, 0.03))
 
-    async def take_screenshot(self, step: int) -> str:
-        """Take a screenshot and return the path"""
+    async def take_screenshot(
+        self, step: int, full_page: bool = False, quality: int = 80
+    ) -> str:
+        """Take a screenshot and return the path
+
+        Captures the viewport as JPEG by default: PNG encoding of a full
+        1080p page is single-threaded zlib work and produces multi-MB files
+        that only get downscaled by the model anyway.
+        """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        path = self.output_dir / f"step_{step}_{timestamp}.png"
-        await self.page.screenshot(path=path)
+        path = self.output_dir / f"step_{step}_{timestamp}.jpg"
+        await self.page.screenshot(
+            path=path, full_page=full_page, type="jpeg", quality=quality
+        )
         return str(path)
 
 
@@ -252,12 +375,10 @@ class AIController:
 
     def __init__(self):
         dotenv.load_dotenv()
-        self.client = AsyncAzureOpenAI(
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version="2023-12-01-preview",
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        )
-        self.conversation_history = []
+        self.client = _get_client()
+        # Only the last six turns ever reach the model; a bounded deque
+        # drops older ones in O(1) instead of accumulating forever
+        self.conversation_history = deque(maxlen=12)
 
     async def make_decision(
         self, screenshot_path: str, elements: List[Dict], goal: str, url: str
@@ -268,7 +389,7 @@ class AIController:
 
         # Get AI response
         response = await self.client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o"),
+            model=_deployment_name(),
             messages=messages,
             response_format={"type": "json_object"},
             max_tokens=1000,
@@ -314,23 +435,44 @@ class AIController:
             """,
         }
 
+        # Send a slim element payload: only the fields the model needs to pick
+        # a target, with compact separators. The full-fidelity dicts (raw
+        # geometry, class names, values) roughly triple the prompt tokens
+        # without improving decisions.
+        slim_elements = [
+            {
+                "tag": e["tag"],
+                "type": e["type"],
+                "text": e["text"][:120],
+                "placeholder": e["placeholder"],
+                "aria_label": e["aria_label"],
+                "id": e["id"],
+                "center_x": int(e["center_x"]),
+                "center_y": int(e["center_y"]),
+            }
+            for e in elements
+        ]
+        elements_json = json.dumps(
+            slim_elements, separators=(",", ":"), ensure_ascii=False
+        )
+
         user_message = {
             "role": "user",
             "content": [
                 {
                     "type": "text",
-                    "text": f"URL: {url}\nGoal: {goal}\n\nElements:\n{json.dumps(elements, indent=2)}",
+                    "text": f"URL: {url}\nGoal: {goal}\n\nElements:\n{elements_json}",
                 },
                 {
                     "type": "image_url",
                     "image_url": {
-                        "url": f"data:image/png;base64,{self._encode_image(screenshot_path)}"
+                        "url": f"data:image/jpeg;base64,{self._encode_image(screenshot_path)}"
                     },
                 },
             ],
         }
 
-        return [system_message] + self.conversation_history[-6:] + [user_message]
+        return [system_message] + list(self.conversation_history)[-6:] + [user_message]
 
     def _log_decision(self, decision: Dict, elements: List[Dict]):
         """Log AI's decision for debugging"""
@@ -357,11 +499,20 @@ class AIController:
 class BugNinja:
     """Main class that orchestrates the testing process"""
 
-    def __init__(self, headless: bool = True, output_dir: str = "./output"):
-        self.crawler = WebCrawler(headless, output_dir)
+    def __init__(
+        self,
+        headless: bool = True,
+        output_dir: str = "./output",
+        keep_browser: bool = False,
+        block_resources: bool = False,
+    ):
+        self.crawler = WebCrawler(headless, output_dir, block_resources)
         self.ai = AIController()
         self.step_count = 0
         self.goal_achieved = False
+        # Keep the browser warm between run_test calls (amortizes launch cost
+        # when running several tests in one process); call stop() when done
+        self.keep_browser = keep_browser
 
     async def run_test(self, url: str, goal: str, max_steps: int = 10):
         """Run the main testing loop"""
@@ -369,6 +520,12 @@ class BugNinja:
             print(f"🌐 Starting test for URL: {url}")
             print(f"🎯 Goal: {goal}")
 
+            # Reset per-test state so a warm instance (keep_browser=True)
+            # starts from scratch instead of replaying the previous verdict
+            self.step_count = 0
+            self.goal_achieved = False
+            self.ai.conversation_history.clear()
+
             await self.crawler.start()
             await self.crawler.navigate(url)
 
@@ -413,11 +570,16 @@ class BugNinja:
                 elif decision.get("action") == "type":
                     await self.crawler.type_text(x, y, decision.get("input_text", ""))
 
-                # Wait for page to load after action
+                # Wait for page to load after action; rendering completion is
+                # observable via requestAnimationFrame, so wait for a painted
+                # frame instead of sleeping a fixed second
                 await self.crawler.wait_for_load()
-                await asyncio.sleep(
-                    1
-                )  # Additional delay to ensure page is fully rendered
+                try:
+                    await self.crawler.page.evaluate(
+                        "() => new Promise(r => requestAnimationFrame(() => r()))"
+                    )
+                except:
+                    pass
 
             # Take one final screenshot if we completed successfully
             if self.goal_achieved:
@@ -427,11 +589,12 @@ class BugNinja:
                 print(f"📸 Final screenshot saved: {final_screenshot}")
 
             print("✅ Test completed" if self.goal_achieved else "❌ Test failed")
-            await self.crawler.stop()
+            if not self.keep_browser:
+                await self.crawler.stop()
 
         except Exception as e:
             print(f"❌ Error during test: {e}")
-            traceback.print_exc()
+            traceback.print_exc(limit=5)
             await self.crawler.stop()
             return False
 